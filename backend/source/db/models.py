@@ -164,6 +164,7 @@ class Order(Base):
         CheckConstraint("subtotal >= 0", name="ck_orders_subtotal_non_negative"),
         CheckConstraint("discount_total >= 0", name="ck_orders_discount_total_non_negative"),
         CheckConstraint("total_amount >= 0", name="ck_orders_total_amount_non_negative"),
+        Index("ix_orders_user_status_created", "user_id", "status", "created_at"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -199,6 +200,7 @@ class Order(Base):
         "OrderItem",
         back_populates="order",
         cascade="all, delete-orphan",
+        order_by="OrderItem.id",
     )
     payments = relationship(
         "Payment",
@@ -230,6 +232,7 @@ class OrderItem(Base):
         CheckConstraint("discount_amount >= 0", name="ck_order_items_discount_amount_non_negative"),
         CheckConstraint("final_unit_price >= 0", name="ck_order_items_final_unit_price_non_negative"),
         CheckConstraint("line_total >= 0", name="ck_order_items_line_total_non_negative"),
+        Index("ix_order_items_order_variant", "order_id", "variant_id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -284,6 +287,7 @@ class Payment(Base):
             postgresql_where=text("status = 'pending'"),
             sqlite_where=text("status = 'pending'"),
         ),
+        Index("ix_payments_order_created", "order_id", "created_at", "id"),
         CheckConstraint("amount >= 0", name="ck_payments_amount_non_negative"),
         CheckConstraint(
             "change_amount IS NULL OR change_amount >= 0",
@@ -1,14 +1,17 @@
 ﻿from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime, timezone, UTC
 from decimal import Decimal
+import math
+import sys
 from typing import Iterable, TypedDict
 
 from sqlalchemy import insert
 from sqlalchemy.orm import Session, joinedload
 
-from source.db.models import Category, Discount, DiscountProduct, Product
-from source.services.money_s import calcular_amount, parse_amount_to_cents
+from source.db.models import Category, Discount, DiscountProduct, Order, Product
+from source.services.money_s import parse_amount_to_cents
 
 ALLOWED_DISCOUNT_TYPES = {"percent", "fixed"}
 ALLOWED_DISCOUNT_SCOPES = {"all", "category", "product", "product_list"}
@@ -28,6 +31,37 @@ class DiscountDTO(TypedDict):
     product_ids: list[int]
 
 
+@dataclass(slots=True)
+class DiscountRule:
+    """Pricing-side view of a discount, read by attribute on the hot paths."""
+
+    id: int
+    type: str
+    value: int
+    scope: str
+    category_id: int | None = None
+    product_id: int | None = None
+    is_active: bool = True
+    starts_at_ts: float = -math.inf
+    ends_at_ts: float = math.inf
+    product_ids: frozenset[int] = frozenset()
+
+    @classmethod
+    def from_model(cls, discount: Discount) -> DiscountRule:
+        return cls(
+            id=int(discount.id),
+            type=sys.intern(str(discount.type)),
+            value=int(discount.value),
+            scope=sys.intern(str(discount.scope)),
+            category_id=None if discount.category_id is None else int(discount.category_id),
+            product_id=None if discount.product_id is None else int(discount.product_id),
+            is_active=bool(discount.is_active),
+            starts_at_ts=_to_epoch(discount.starts_at, default=-math.inf),
+            ends_at_ts=_to_epoch(discount.ends_at, default=math.inf),
+            product_ids=frozenset(int(link.product_id) for link in discount.product_links),
+        )
+
+
 def _coerce_datetime(value) -> datetime | None:
     if value is None or isinstance(value, datetime):
         if value is None:
@@ -46,6 +80,13 @@ def _coerce_datetime(value) -> datetime | None:
     return None
 
 
+def _to_epoch(value, *, default: float) -> float:
+    coerced = _coerce_datetime(value)
+    if coerced is None:
+        return default
+    return coerced.timestamp()
+
+
 def _normalize_discount_value(discount_type: str, value: object) -> int:
     if value is None:
         raise ValueError("discount value must be greater than 0")
@@ -87,20 +128,30 @@ def list_discounts(db: Session) -> list[DiscountDTO]:
     return [_discount_to_dict(discount) for discount in discounts]
 
 
-def get_discount_by_id(discount_id: int, db: Session) -> DiscountDTO | None:
-    discount = (
+def list_discount_rules(db: Session) -> list[DiscountRule]:
+    discounts = (
         db.query(Discount)
         .options(joinedload(Discount.product_links))
-        .filter(Discount.id == discount_id)
-        .first()
+        .order_by(Discount.id.asc())
+        .all()
     )
+    return [DiscountRule.from_model(discount) for discount in discounts]
+
+
+def _get_discount_model(discount_id: int, db: Session) -> Discount | None:
+    # Session.get answers from the identity map when the row is already loaded.
+    return db.get(Discount, discount_id, options=[joinedload(Discount.product_links)])
+
+
+def get_discount_by_id(discount_id: int, db: Session) -> DiscountDTO | None:
+    discount = _get_discount_model(discount_id, db=db)
     if discount is None:
         return None
     return _discount_to_dict(discount)
 
 
 def _set_discount_product_list(db: Session, discount: Discount, product_ids: list[int]) -> None:
-    unique_ids = list(dict.fromkeys(product_ids))
+    unique_ids = frozenset(product_ids)
     if unique_ids:
         existing_count = (
             db.query(Product.id)
@@ -114,7 +165,10 @@ def _set_discount_product_list(db: Session, discount: Discount, product_ids: lis
         DiscountProduct.discount_id == discount.id
     ).delete(synchronize_session=False)
     if unique_ids:
-        rows = [{"discount_id": discount.id, "product_id": product_id} for product_id in unique_ids]
+        rows = [
+            {"discount_id": discount.id, "product_id": product_id}
+            for product_id in sorted(unique_ids)
+        ]
         db.execute(insert(DiscountProduct), rows)
 
 
@@ -145,21 +199,15 @@ def create_discount(payload: dict, db: Session) -> DiscountDTO:
 
     db.flush()
     db.refresh(discount)
-    result = get_discount_by_id(discount.id, db=db)
-    if result is None:
-        raise LookupError("discount not found")
-    return result
+    return _discount_to_dict(discount)
 
 
 def update_discount(discount_id: int, updates: dict, db: Session) -> DiscountDTO | None:
-    discount = db.query(Discount).filter(Discount.id == discount_id).first()
+    discount = _get_discount_model(discount_id, db=db)
     if discount is None:
         return None
 
-    current = get_discount_by_id(discount_id=discount_id, db=db)
-    if current is None:
-        return None
-
+    current = _discount_to_dict(discount)
     merged = {**current, **updates}
     _validate_discount_payload(merged, db=db)
     normalized_value = _normalize_discount_value(merged["type"], merged["value"])
@@ -185,16 +233,11 @@ def update_discount(discount_id: int, updates: dict, db: Session) -> DiscountDTO
 
     db.flush()
     db.refresh(discount)
-    return get_discount_by_id(discount_id, db=db)
+    return _discount_to_dict(discount)
 
 
 def delete_discount(discount_id: int, db: Session) -> DiscountDTO | None:
-    discount = (
-        db.query(Discount)
-        .options(joinedload(Discount.product_links))
-        .filter(Discount.id == discount_id)
-        .first()
-    )
+    discount = _get_discount_model(discount_id, db=db)
     if discount is None:
         return None
     serialized = _discount_to_dict(discount)
@@ -255,54 +298,40 @@ def _validate_discount_payload(payload: dict, *, db: Session) -> None:
             raise ValueError("product_ids is required for product_list scope")
 
 
-def is_discount_currently_valid(discount: DiscountDTO, at: datetime | None = None) -> bool:
+def _resolve_now_ts(at: datetime | None) -> float:
     if at is None:
-        now = datetime.now(timezone.utc)
-    elif at.tzinfo is None:
-        now = at.replace(tzinfo=timezone.utc)
-    else:
-        now = at.astimezone(timezone.utc)
-    if not discount.get("is_active", False):
-        return False
+        return datetime.now(timezone.utc).timestamp()
+    if at.tzinfo is None:
+        return at.replace(tzinfo=timezone.utc).timestamp()
+    return at.timestamp()
+
 
-    starts_at = _coerce_datetime(discount.get("starts_at"))
-    ends_at = _coerce_datetime(discount.get("ends_at"))
+def is_discount_currently_valid(discount: DiscountRule, at: datetime | None = None) -> bool:
+    return _is_discount_valid_at(discount, _resolve_now_ts(at))
 
-    if starts_at is not None and now < starts_at:
-        return False
-    if ends_at is not None and now > ends_at:
-        return False
-    return True
 
+def _is_discount_valid_at(discount: DiscountRule, now_ts: float) -> bool:
+    return discount.is_active and discount.starts_at_ts <= now_ts <= discount.ends_at_ts
 
-def calculate_line_discount(unit_price: int, discount: DiscountDTO) -> int:
-    discount_type = discount.get("type")
-    value = int(discount.get("value", 0))
 
+def calculate_line_discount(unit_price: int, discount: DiscountRule) -> int:
+    value = discount.value
     if unit_price <= 0 or value <= 0:
         return 0
 
+    discount_type = discount.type
     if discount_type == "percent":
-        pricing = calcular_amount(
-            unit_price=unit_price,
-            quantity=1,
-            discount_type="percent",
-            discount_value=value,
-        )
+        # Same ROUND_HALF_UP-to-cents result as calcular_amount, in integer math.
+        amount = (unit_price * value + 50) // 100
     elif discount_type == "fixed":
-        pricing = calcular_amount(
-            unit_price=unit_price,
-            quantity=1,
-            discount_type="fixed",
-            discount_value=value,
-        )
+        amount = value
     else:
         return 0
-    return int(pricing["discount_amount"])
+    return amount if amount < unit_price else unit_price
 
 
-def select_best_discount(discounts: Iterable[DiscountDTO], unit_price: int) -> DiscountDTO | None:
-    best: DiscountDTO | None = None
+def select_best_discount(discounts: Iterable[DiscountRule], unit_price: int) -> DiscountRule | None:
+    best: DiscountRule | None = None
     best_amount = 0
 
     for discount in discounts:
@@ -314,89 +343,102 @@ def select_best_discount(discounts: Iterable[DiscountDTO], unit_price: int) -> D
     return best
 
 
-def calculate_line_pricing(unit_price: int, quantity: int, discount: DiscountDTO | None) -> dict:
+def calculate_line_pricing(unit_price: int, quantity: int, discount: DiscountRule | None) -> dict:
     if quantity <= 0:
         raise ValueError("quantity must be greater than 0")
+    if unit_price < 0:
+        raise ValueError("unit_price must be greater than or equal to 0")
 
-    discount_type = None
-    discount_value = None
     discount_id = None
+    discount_amount = 0
     if discount is not None:
-        discount_type = str(discount.get("type"))
-        discount_value = int(discount.get("value", 0))
-        discount_id = discount.get("id")
-
-    pricing = calcular_amount(
-        unit_price=unit_price,
-        quantity=quantity,
-        discount_type=discount_type,
-        discount_value=discount_value,
-    )
+        if discount.type not in ALLOWED_DISCOUNT_TYPES:
+            raise ValueError("invalid discount_type")
+        discount_id = discount.id
+        discount_amount = calculate_line_discount(unit_price=unit_price, discount=discount)
+
+    # calculate_line_discount clamps to unit_price, so no lower bound is needed here.
+    assert discount_amount <= unit_price
+    final_unit_price = unit_price - discount_amount
     return {
-        "unit_price": int(pricing["unit_price"]),
+        "unit_price": unit_price,
         "quantity": quantity,
         "discount_id": discount_id,
-        "discount_amount": int(pricing["discount_amount"]),
-        "final_unit_price": int(pricing["final_unit_price"]),
-        "line_total": int(pricing["line_total"]),
+        "discount_amount": discount_amount,
+        "final_unit_price": final_unit_price,
+        "line_total": final_unit_price * quantity,
     }
 
 
-def get_applicable_discounts_for_product(product: dict, discounts: Iterable[DiscountDTO]) -> list[DiscountDTO]:
-    applicable: list[DiscountDTO] = []
-    product_id = product.get("id")
-    category_id = product.get("category_id")
+def get_applicable_discounts_for_product(
+    product: dict,
+    discounts: Iterable[DiscountRule],
+    at: datetime | None = None,
+) -> list[DiscountRule]:
+    applicable: list[DiscountRule] = []
+    product_id = int(product.get("id"))
+    category_id = int(product.get("category_id"))
+    now_ts = _resolve_now_ts(at)
 
     for discount in discounts:
-        if not is_discount_currently_valid(discount):
+        if not _is_discount_valid_at(discount, now_ts):
             continue
 
-        scope = discount.get("scope")
+        scope = discount.scope
 
         if scope == "all":
             applicable.append(discount)
-        elif scope == "category" and int(discount.get("category_id") or 0) == int(category_id):
+        elif scope == "category" and discount.category_id == category_id:
+            applicable.append(discount)
+        elif scope == "product" and discount.product_id == product_id:
             applicable.append(discount)
-        elif scope == "product" and int(discount.get("product_id") or 0) == int(product_id):
+        elif scope == "product_list" and product_id in discount.product_ids:
             applicable.append(discount)
-        elif scope == "product_list":
-            product_ids = discount.get("product_ids", [])
-            if str(product_id) in {str(pid) for pid in product_ids}:
-                applicable.append(discount)
 
     return applicable
 
 
 def set_discount_product_list(discount: DiscountDTO, product_ids: list[int]) -> DiscountDTO:
-    discount["product_ids"] = list(dict.fromkeys(product_ids))
+    discount["product_ids"] = sorted(frozenset(product_ids))
     return discount
 
 
 def add_products_to_discount(discount: DiscountDTO, product_ids: list[int]) -> DiscountDTO:
-    current = set(discount.get("product_ids", []))
-    current.update(product_ids)
-    discount["product_ids"] = sorted(current)
+    current = frozenset(discount.get("product_ids", []))
+    discount["product_ids"] = sorted(current | frozenset(product_ids))
     return discount
 
 
 def remove_products_from_discount(discount: DiscountDTO, product_ids: list[int]) -> DiscountDTO:
-    to_remove = set(product_ids)
-    current = [pid for pid in discount.get("product_ids", []) if pid not in to_remove]
-    discount["product_ids"] = current
+    current = frozenset(discount.get("product_ids", []))
+    discount["product_ids"] = sorted(current - frozenset(product_ids))
     return discount
 
 
-def reprice_order_items(order: dict, discounts: Iterable[DiscountDTO], products_by_id: dict[int, dict]) -> dict:
-    for item in order.get("items", []):
-        product = products_by_id.get(item["product_id"])
+def reprice_order_items(
+    order: dict,
+    discounts: Iterable[DiscountRule],
+    products_by_id: dict[int, dict],
+    at: datetime | None = None,
+) -> dict:
+    # One clock read per pass so every line sees the same validity window.
+    now = at if at is not None else datetime.now(timezone.utc)
+    items = [_coerce_order_item_amounts(item) for item in order.get("items", [])]
+    applicable_by_product_id: dict[int, list[DiscountRule]] = {}
+    for item in items:
+        product_id = item["product_id"]
+        product = products_by_id.get(product_id)
         if product is None:
             continue
 
-        applicable = get_applicable_discounts_for_product(product=product, discounts=discounts)
-        best = select_best_discount(applicable, unit_price=int(item["unit_price"]))
+        applicable = applicable_by_product_id.get(product_id)
+        if applicable is None:
+            applicable = get_applicable_discounts_for_product(product=product, discounts=discounts, at=now)
+            applicable_by_product_id[product_id] = applicable
+        best = select_best_discount(applicable, unit_price=item["unit_price"])
         pricing = calculate_line_pricing(
-            unit_price=int(item["unit_price"]),
-            quantity=int(item["quantity"]),
+            unit_price=item["unit_price"],
+            quantity=item["quantity"],
             discount=best,
         )
 
@@ -405,23 +447,29 @@ def reprice_order_items(order: dict, discounts: Iterable[DiscountDTO], products_
         item["final_unit_price"] = pricing["final_unit_price"]
         item["line_total"] = pricing["line_total"]
 
-    return recalculate_order_totals(order)
+    return _apply_order_totals(order, items)
 
 
-def recalculate_order_totals(order: dict) -> dict:
+def _coerce_order_item_amounts(item: dict) -> dict:
+    unit_price = int(item.get("unit_price", 0))
+    quantity = int(item.get("quantity", 0))
+    item["unit_price"] = unit_price
+    item["quantity"] = quantity
+    item["line_total"] = int(item.get("line_total", unit_price * quantity))
+    item["discount_amount"] = int(item.get("discount_amount", 0))
+    return item
+
+
+def _apply_order_totals(order: dict, items: list[dict]) -> dict:
+    # Items must already carry int unit_price/quantity/discount_amount/line_total.
     subtotal = 0
     discount_total = 0
     total_amount = 0
-
-    for item in order.get("items", []):
-        unit_price = int(item.get("unit_price", 0))
-        qty = int(item.get("quantity", 0))
-        line_total = int(item.get("line_total", unit_price * qty))
-        line_discount = int(item.get("discount_amount", 0)) * qty
-
-        subtotal += unit_price * qty
-        discount_total += line_discount
-        total_amount += line_total
+    for item in items:
+        quantity = item["quantity"]
+        subtotal += item["unit_price"] * quantity
+        discount_total += item["discount_amount"] * quantity
+        total_amount += item["line_total"]
 
     order["subtotal"] = subtotal
     order["discount_total"] = discount_total
@@ -429,16 +477,21 @@ def recalculate_order_totals(order: dict) -> dict:
     return order
 
 
+def recalculate_order_totals(order: dict) -> dict:
+    items = [_coerce_order_item_amounts(item) for item in order.get("items", [])]
+    return _apply_order_totals(order, items)
+
+
 def freeze_order_pricing(order: dict) -> dict:
     order["pricing_frozen"] = True
     order["pricing_frozen_at"] = datetime.now(UTC).isoformat().replace("+00:00", "Z")
     return order
 
 
-def validate_order_pricing_before_submit(order: dict) -> None:
-    if not order.get("items"):
+def validate_order_pricing_before_submit(order: Order) -> None:
+    if not order.items:
         raise ValueError("cannot submit an empty order")
-    if int(order.get("total_amount", 0)) < 0:
+    if int(order.total_amount or 0) < 0:
         raise ValueError("order total cannot be negative")
 
 
@@ -65,6 +65,7 @@ def save_completed_record(
     db: Session,
     expires_at: datetime | None = None,
 ) -> IdempotencyRecord:
+    now = datetime.now(UTC)
     record = IdempotencyRecord(
         scope=scope,
         idempotency_key=idempotency_key,
@@ -76,8 +77,8 @@ def save_completed_record(
             default=_json_default,
         ),
         status="completed",
-        created_at=datetime.now(UTC),
-        expires_at=expires_at or (datetime.now(UTC) + timedelta(hours=IDEMPOTENCY_TTL_HOURS)),
+        created_at=now,
+        expires_at=expires_at or (now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)),
     )
     db.add(record)
     db.flush()
@@ -92,14 +93,15 @@ def acquire_record(
     db: Session,
     expires_at: datetime | None = None,
 ) -> tuple[IdempotencyRecord, bool]:
+    now = datetime.now(UTC)
     record = IdempotencyRecord(
         scope=scope,
         idempotency_key=idempotency_key,
         request_hash=request_hash,
         response_payload="{}",
         status="processing",
-        created_at=datetime.now(UTC),
-        expires_at=expires_at or (datetime.now(UTC) + timedelta(hours=IDEMPOTENCY_TTL_HOURS)),
+        created_at=now,
+        expires_at=expires_at or (now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)),
     )
     try:
         with db.begin_nested():
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
+import random
+import threading
 import time
 
 from sqlalchemy.orm import Session
@@ -23,16 +26,37 @@ from source.services.payment_errors import (
 
 try:
     import mercadopago
+    import requests
     from mercadopago.config.request_options import RequestOptions
+    from mercadopago.http import HttpClient
+    from requests.adapters import HTTPAdapter
 except ImportError as exc:  # pragma: no cover - dependency availability
     mercadopago = None
+    requests = None
     RequestOptions = None
+    HttpClient = object
+    HTTPAdapter = None
     _import_error = exc
 else:
     _import_error = None
 
 MAX_RETRY_ATTEMPTS = 3
 RETRY_BASE_DELAY_SECONDS = 0.2
+RETRY_MAX_DELAY_SECONDS = 2.0
+SUPPORTED_WEBHOOK_TOPICS = frozenset({"payment"})
+VALIDATION_ERROR_STATUSES = frozenset({400, 404, 422})
+AUTH_ERROR_STATUSES = frozenset({401, 403})
+PROVIDER_SETTINGS_TTL_SECONDS = 60.0
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+WEBHOOK_INFLIGHT_TTL_SECONDS = 30.0
+
+_provider_settings_lock = threading.Lock()
+_provider_settings: dict = {"access_token": None, "timeout_seconds": None, "loaded_at": None}
+_sdk_lock = threading.Lock()
+_sdk_cache: dict = {}
+_webhook_inflight_lock = threading.Lock()
+_webhook_inflight: dict[str, tuple[float, object]] = {}
 
 
 @dataclass(frozen=True)
@@ -42,6 +66,40 @@ class WebhookResult:
     payment: dict | None = None
 
 
+class _PooledHttpClient(HttpClient):
+    """SDK transport that keeps one keep-alive session across requests."""
+
+    def __init__(self) -> None:
+        self._session = requests.Session()
+        # Retries are driven by _call_with_retries, so the adapter never retries.
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=HTTP_POOL_CONNECTIONS,
+                pool_maxsize=HTTP_POOL_MAXSIZE,
+                max_retries=0,
+            ),
+        )
+
+    def request(
+        self,
+        method,
+        url,
+        maxretries=None,
+        retry_on=None,
+        backoff_factor=None,
+        **kwargs,
+    ) -> dict:
+        api_result = self._session.request(method, url, **kwargs)
+        response = {"status": api_result.status_code, "response": None}
+        if api_result.status_code != 204 and api_result.content:
+            try:
+                response["response"] = api_result.json()
+            except ValueError:
+                response["response"] = None
+        return response
+
+
 class WebhookNoOpError(Exception):
     pass
 
@@ -74,13 +132,50 @@ def _build_mp_event_key(payload: dict, data_id: str | int) -> str:
     return f"mp:{topic}:{data_id}:{action}"
 
 
+def _backoff_sleep(attempt: int) -> None:
+    # Full jitter over a capped exponential window keeps concurrent retries from
+    # hitting the provider in lockstep after a burst of failures.
+    window = min(
+        RETRY_MAX_DELAY_SECONDS,
+        RETRY_BASE_DELAY_SECONDS * (1 << (attempt - 1)),
+    )
+    time.sleep(random.uniform(0, window))
+
+
+def _get_provider_settings() -> tuple[str, int]:
+    # Env-backed settings are re-read at most once per TTL instead of per call.
+    loaded_at = _provider_settings["loaded_at"]
+    now = time.monotonic()
+    if loaded_at is None or now - loaded_at > PROVIDER_SETTINGS_TTL_SECONDS:
+        with _provider_settings_lock:
+            loaded_at = _provider_settings["loaded_at"]
+            if loaded_at is None or now - loaded_at > PROVIDER_SETTINGS_TTL_SECONDS:
+                _provider_settings.update(
+                    access_token=get_mercadopago_access_token(),
+                    timeout_seconds=get_mercadopago_timeout_seconds(),
+                    loaded_at=now,
+                )
+    return _provider_settings["access_token"], _provider_settings["timeout_seconds"]
+
+
 def _get_sdk():
     if mercadopago is None:
         raise PaymentProviderUnavailableError(
             "mercadopago SDK is not installed. Install with: pip install mercadopago"
         ) from _import_error
 
-    return mercadopago.SDK(get_mercadopago_access_token())
+    access_token, _ = _get_provider_settings()
+    sdk = _sdk_cache.get(access_token)
+    if sdk is None:
+        with _sdk_lock:
+            sdk = _sdk_cache.get(access_token)
+            if sdk is None:
+                sdk = mercadopago.SDK(access_token, http_client=_PooledHttpClient())
+                # Only the current token is kept so a rotated credential
+                # does not leave stale clients behind.
+                _sdk_cache.clear()
+                _sdk_cache[access_token] = sdk
+    return sdk
 
 
 def _build_request_options(
@@ -94,76 +189,89 @@ def _build_request_options(
     custom_headers = None
     if idempotency_key:
         custom_headers = {"x-idempotency-key": idempotency_key}
+    _, timeout_seconds = _get_provider_settings()
     return RequestOptions(
-        connection_timeout=float(get_mercadopago_timeout_seconds()),
+        connection_timeout=float(timeout_seconds),
         custom_headers=custom_headers,
     )
 
 
 def _handle_response_status(status: int, *, operation: str) -> None:
-    if status in {400, 404, 422}:
+    if status in VALIDATION_ERROR_STATUSES:
         raise PaymentProviderValidationError(f"mercadopago {operation} rejected")
-    if status in {401, 403}:
+    if status in AUTH_ERROR_STATUSES:
         raise PaymentProviderAuthError("mercadopago credentials rejected")
     if status >= 400:
         raise PaymentProviderError(f"mercadopago {operation} failed")
 
 
-def create_checkout_preference(
-    preference_payload: dict,
+def _call_with_retries(
+    thunk: Callable[[], dict],
     *,
-    idempotency_key: str | None = None,
+    operation: str,
+    request_kind: str | None = None,
 ) -> dict:
-    sdk = _get_sdk()
-    request_options = _build_request_options(idempotency_key=idempotency_key)
+    prefix = f"{request_kind} " if request_kind else ""
     for attempt in range(1, MAX_RETRY_ATTEMPTS + 1):
         try:
-            response = sdk.preference().create(
-                preference_payload,
-                request_options=request_options,
-            )
+            response = thunk()
         except TimeoutError as exc:
             if attempt == MAX_RETRY_ATTEMPTS:
                 raise PaymentProviderTimeoutError(
-                    "mercadopago request timed out"
+                    f"mercadopago {prefix}request timed out"
                 ) from exc
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
+            _backoff_sleep(attempt)
             continue
         except Exception as exc:
             if attempt == MAX_RETRY_ATTEMPTS:
                 raise PaymentProviderUnavailableError(
-                    "mercadopago request failed"
+                    f"mercadopago {prefix}request failed"
                 ) from exc
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
+            _backoff_sleep(attempt)
             continue
 
         status = int(response.get("status", 0))
-        data = response.get("response")
         if status >= 500:
             if attempt == MAX_RETRY_ATTEMPTS:
                 raise PaymentProviderUnavailableError("mercadopago unavailable")
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-        _handle_response_status(status, operation="preference creation")
-        if not isinstance(data, dict):
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderUnavailableError(
-                    "mercadopago invalid response payload"
-                )
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
+            _backoff_sleep(attempt)
             continue
+        _handle_response_status(status, operation=operation)
+        data = response.get("response")
+        if isinstance(data, dict):
+            return data
+        if attempt == MAX_RETRY_ATTEMPTS:
+            raise PaymentProviderUnavailableError(
+                f"mercadopago invalid {prefix}response payload"
+            )
+        _backoff_sleep(attempt)
 
-        preference_id = data.get("id")
-        init_point = data.get("init_point")
-        sandbox_init_point = data.get("sandbox_init_point")
-        if not preference_id:
-            raise PaymentProviderValidationError("mercadopago preference id missing")
-        if not init_point and not sandbox_init_point:
-            raise PaymentProviderValidationError("mercadopago checkout url missing")
+    raise PaymentProviderUnavailableError(f"mercadopago {operation} failed")
 
-        return data
 
-    raise PaymentProviderUnavailableError("mercadopago preference creation failed")
+def create_checkout_preference(
+    preference_payload: dict,
+    *,
+    idempotency_key: str | None = None,
+) -> dict:
+    sdk = _get_sdk()
+    request_options = _build_request_options(idempotency_key=idempotency_key)
+    data = _call_with_retries(
+        lambda: sdk.preference().create(
+            preference_payload,
+            request_options=request_options,
+        ),
+        operation="preference creation",
+    )
+
+    preference_id = data.get("id")
+    init_point = data.get("init_point")
+    sandbox_init_point = data.get("sandbox_init_point")
+    if not preference_id:
+        raise PaymentProviderValidationError("mercadopago preference id missing")
+    if not init_point and not sandbox_init_point:
+        raise PaymentProviderValidationError("mercadopago checkout url missing")
+    return data
 
 
 def get_payment_by_id(payment_id: str | int) -> dict:
@@ -173,46 +281,13 @@ def get_payment_by_id(payment_id: str | int) -> dict:
         raise PaymentProviderValidationError("mercadopago payment id is required")
 
     request_options = _build_request_options()
-    for attempt in range(1, MAX_RETRY_ATTEMPTS + 1):
-        try:
-            response = sdk.payment().get(
-                payment_id_str,
-                request_options=request_options,
-            )
-        except TimeoutError as exc:
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderTimeoutError(
-                    "mercadopago request timed out"
-                ) from exc
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-        except Exception as exc:
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderUnavailableError(
-                    "mercadopago request failed"
-                ) from exc
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-
-        status = int(response.get("status", 0))
-        data = response.get("response")
-        if status >= 500:
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderUnavailableError("mercadopago unavailable")
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-
-        _handle_response_status(status, operation="payment lookup")
-        if not isinstance(data, dict):
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderUnavailableError(
-                    "mercadopago invalid response payload"
-                )
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-        return data
-
-    raise PaymentProviderUnavailableError("mercadopago payment lookup failed")
+    return _call_with_retries(
+        lambda: sdk.payment().get(
+            payment_id_str,
+            request_options=request_options,
+        ),
+        operation="payment lookup",
+    )
 
 
 def find_latest_payment_by_external_reference(external_reference: str) -> dict | None:
@@ -228,47 +303,21 @@ def find_latest_payment_by_external_reference(external_reference: str) -> dict |
         "limit": 1,
     }
     request_options = _build_request_options()
-    for attempt in range(1, MAX_RETRY_ATTEMPTS + 1):
-        try:
-            response = sdk.payment().search(
-                request_payload,
-                request_options=request_options,
-            )
-        except TimeoutError as exc:
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderTimeoutError("mercadopago request timed out") from exc
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-        except Exception as exc:
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderUnavailableError("mercadopago request failed") from exc
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-
-        status = int(response.get("status", 0))
-        data = response.get("response")
-        if status >= 500:
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderUnavailableError("mercadopago unavailable")
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-
-        _handle_response_status(status, operation="payment search")
-        if not isinstance(data, dict):
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderUnavailableError("mercadopago invalid response payload")
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-
-        results = data.get("results")
-        if not isinstance(results, list) or not results:
-            return None
-        first = results[0]
-        if not isinstance(first, dict):
-            return None
-        return first
+    data = _call_with_retries(
+        lambda: sdk.payment().search(
+            request_payload,
+            request_options=request_options,
+        ),
+        operation="payment search",
+    )
 
-    raise PaymentProviderUnavailableError("mercadopago payment search failed")
+    results = data.get("results")
+    if not isinstance(results, list) or not results:
+        return None
+    first = results[0]
+    if not isinstance(first, dict):
+        return None
+    return first
 
 
 def create_refund(
@@ -289,40 +338,15 @@ def create_refund(
         payload["amount"] = float(int(amount)) / 100.0
 
     request_options = _build_request_options(idempotency_key=idempotency_key)
-    for attempt in range(1, MAX_RETRY_ATTEMPTS + 1):
-        try:
-            response = sdk.refund().create(
-                payment_id_str,
-                payload if payload else None,
-                request_options=request_options,
-            )
-        except TimeoutError as exc:
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderTimeoutError("mercadopago refund request timed out") from exc
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-        except Exception as exc:
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderUnavailableError("mercadopago refund request failed") from exc
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-
-        status = int(response.get("status", 0))
-        data = response.get("response")
-        if status >= 500:
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderUnavailableError("mercadopago unavailable")
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-        _handle_response_status(status, operation="refund creation")
-        if not isinstance(data, dict):
-            if attempt == MAX_RETRY_ATTEMPTS:
-                raise PaymentProviderUnavailableError("mercadopago invalid refund response payload")
-            time.sleep(RETRY_BASE_DELAY_SECONDS * attempt)
-            continue
-        return data
-
-    raise PaymentProviderUnavailableError("mercadopago refund creation failed")
+    return _call_with_retries(
+        lambda: sdk.refund().create(
+            payment_id_str,
+            payload if payload else None,
+            request_options=request_options,
+        ),
+        operation="refund creation",
+        request_kind="refund",
+    )
 
 
 def process_mercadopago_event_payload(
@@ -357,6 +381,29 @@ def process_mercadopago_event_payload(
     )
 
 
+def _claim_inflight_webhook(event_key: str) -> object | None:
+    # Per-process shortcut only: the unique webhook_events (provider, event_key)
+    # row is what keeps deliveries handled by different workers from both
+    # applying the event.
+    now = time.monotonic()
+    with _webhook_inflight_lock:
+        claim = _webhook_inflight.get(event_key)
+        if claim is not None and now - claim[0] < WEBHOOK_INFLIGHT_TTL_SECONDS:
+            return None
+        token = object()
+        _webhook_inflight[event_key] = (now, token)
+        return token
+
+
+def _release_inflight_webhook(event_key: str, token: object) -> None:
+    # A delivery that outlived the TTL may have lost its claim to a redelivery;
+    # it must not drop the claim that redelivery now holds.
+    with _webhook_inflight_lock:
+        claim = _webhook_inflight.get(event_key)
+        if claim is not None and claim[1] is token:
+            del _webhook_inflight[event_key]
+
+
 def resolver_evento_webhook_mercadopago(
     *,
     payload: dict,
@@ -368,7 +415,7 @@ def resolver_evento_webhook_mercadopago(
         raise WebhookNoOpError("invalid webhook payload")
 
     topic = str(payload.get("type") or payload.get("topic") or "").strip().lower()
-    if topic and topic not in {"payment"}:
+    if topic and topic not in SUPPORTED_WEBHOOK_TOPICS:
         raise WebhookNoOpError("unsupported topic")
 
     data_id = _extract_mercadopago_data_id(payload)
@@ -383,8 +430,30 @@ def resolver_evento_webhook_mercadopago(
     if not is_signature_valid:
         raise WebhookInvalidSignatureError("invalid signature")
 
+    # Redeliveries of an event that is still being handled are dropped before
+    # they cost a provider lookup or wait on the webhook_events insert.
     event_key = _build_mp_event_key(payload, data_id)
+    claim_token = _claim_inflight_webhook(event_key)
+    if claim_token is None:
+        raise WebhookNoOpError("duplicate webhook event")
+    try:
+        return _resolve_webhook_event(
+            payload=payload,
+            data_id=data_id,
+            event_key=event_key,
+            db=db,
+        )
+    finally:
+        _release_inflight_webhook(event_key, claim_token)
+
 
+def _resolve_webhook_event(
+    *,
+    payload: dict,
+    data_id: str,
+    event_key: str,
+    db: Session,
+) -> WebhookResult:
     # Local imports avoid a module cycle: payment_s imports this client module.
     from source.services.payment_s import (
         acquire_webhook_event,
@@ -402,11 +471,14 @@ def resolver_evento_webhook_mercadopago(
         raise WebhookNoOpError("duplicate webhook event")
 
     try:
-        updated_payment = process_mercadopago_event_payload(
-            payload=payload,
-            data_id=data_id,
-            db=db,
-        )
+        # The payment update runs in a savepoint so a failed apply is discarded
+        # before the event bookkeeping is written in the same transaction.
+        with db.begin_nested():
+            updated_payment = process_mercadopago_event_payload(
+                payload=payload,
+                data_id=data_id,
+                db=db,
+            )
     except WebhookNoOpError as exc:
         if _is_retryable_noop_error(exc):
             mark_webhook_event_failed(
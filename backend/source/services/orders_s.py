@@ -3,18 +3,18 @@
 import logging
 from datetime import UTC, datetime
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from source.db.models import Order, OrderItem, ProductVariant, User
 from source.exceptions import OrderStatusTransitionError
 from source.services.discount_s import (
     calculate_line_pricing,
-    list_discounts,
+    list_discount_rules,
     reprice_order_items,
     validate_order_pricing_before_submit,
 )
-from source.services.payment_s import confirm_manual_payment_for_order
-from source.services.products_s import get_product_by_id
+from source.services.payment_s import confirm_manual_payment_with_order
+from source.services.products_s import get_products_by_ids
 from source.services.stock_reservations_s import (
     expire_active_reservations_for_order,
     list_reservations_for_order,
@@ -78,10 +78,14 @@ def _assert_transition_preconditions(
 
 
 def _order_query(db: Session):
+    # Items load in a second IN query so order columns are not repeated per line
+    # and paginated listings do not need a LIMIT subquery around a collection join.
     return db.query(Order).options(
         joinedload(Order.user),
-        joinedload(Order.items).joinedload(OrderItem.variant),
-        joinedload(Order.items).joinedload(OrderItem.product),
+        selectinload(Order.items).options(
+            joinedload(OrderItem.variant),
+            joinedload(OrderItem.product),
+        ),
     )
 
 
@@ -97,7 +101,7 @@ def _variant_label(variant: ProductVariant | None) -> str:
 
 def _order_to_dict(order: Order) -> dict:
     items = []
-    for item in sorted(order.items, key=lambda x: x.id):
+    for item in order.items:
         items.append(
             {
                 "id": item.id,
@@ -138,6 +142,7 @@ def _recalculate_order_total(order: Order, db: Session, *, force: bool = False)
     if bool(order.pricing_frozen) and not force:
         raise ValueError("cannot recalculate a frozen order")
 
+    items = list(order.items)
     order_payload = {
         "items": [
             {
@@ -151,7 +156,7 @@ def _recalculate_order_total(order: Order, db: Session, *, force: bool = False)
                 "final_unit_price": int(item.final_unit_price or 0),
                 "line_total": int(item.line_total or 0),
             }
-            for item in order.items
+            for item in items
         ],
         "subtotal": int(order.subtotal or 0),
         "discount_total": int(order.discount_total or 0),
@@ -159,31 +164,28 @@ def _recalculate_order_total(order: Order, db: Session, *, force: bool = False)
         "pricing_frozen": bool(order.pricing_frozen),
     }
 
-    products_by_id: dict[int, dict] = {}
-    for item in order_payload["items"]:
-        product = get_product_by_id(item["product_id"], db=db)
-        if product is not None:
-            products_by_id[item["product_id"]] = product
+    products_by_id = get_products_by_ids(
+        (item["product_id"] for item in order_payload["items"]),
+        db=db,
+    )
 
     reprice_order_items(
         order=order_payload,
-        discounts=list_discounts(db=db),
+        discounts=list_discount_rules(db=db),
         products_by_id=products_by_id,
     )
 
-    item_by_id = {item.id: item for item in order.items}
-    for item_payload in order_payload["items"]:
-        item = item_by_id.get(int(item_payload["id"]))
-        if item is None:
-            continue
-        item.discount_id = item_payload.get("discount_id")
-        item.discount_amount = int(item_payload.get("discount_amount", 0))
-        item.final_unit_price = int(item_payload.get("final_unit_price", 0))
-        item.line_total = int(item_payload.get("line_total", 0))
+    # reprice_order_items updates the payload dicts in place and in order, so each
+    # ORM line pairs with its payload and the amounts are already ints.
+    for item, item_payload in zip(items, order_payload["items"]):
+        item.discount_id = item_payload["discount_id"]
+        item.discount_amount = item_payload["discount_amount"]
+        item.final_unit_price = item_payload["final_unit_price"]
+        item.line_total = item_payload["line_total"]
 
-    order.subtotal = int(order_payload.get("subtotal", 0))
-    order.discount_total = int(order_payload.get("discount_total", 0))
-    order.total_amount = int(order_payload.get("total_amount", 0))
+    order.subtotal = order_payload["subtotal"]
+    order.discount_total = order_payload["discount_total"]
+    order.total_amount = order_payload["total_amount"]
 
 
 def _normalize_requested_items(items: list[dict]) -> dict[int, int]:
@@ -215,8 +217,14 @@ def _build_order_item_fields(*, variant: ProductVariant, quantity: int) -> dict:
     }
 
 
-def get_or_create_draft_order(user_id: int, db: Session) -> tuple[dict, bool]:
-    draft = (
+def _lock_user_for_draft_creation(user_id: int, db: Session) -> None:
+    # Concurrent requests for the same user serialize on the user row, so the
+    # draft lookup repeated after this lock cannot race another insert.
+    db.query(User.id).filter(User.id == user_id).with_for_update().first()
+
+
+def _find_user_draft_order(user_id: int, db: Session) -> Order | None:
+    return (
         _order_query(db)
         .filter(
             Order.user_id == user_id,
@@ -225,6 +233,28 @@ def get_or_create_draft_order(user_id: int, db: Session) -> tuple[dict, bool]:
         .order_by(Order.created_at.desc(), Order.id.desc())
         .first()
     )
+
+
+def _lock_user_draft_order(user_id: int, db: Session) -> Order | None:
+    return (
+        _order_lock_query(db)
+        .filter(
+            Order.user_id == user_id,
+            Order.status == "draft",
+        )
+        .order_by(Order.created_at.desc(), Order.id.desc())
+        .with_for_update()
+        .first()
+    )
+
+
+def get_or_create_draft_order(user_id: int, db: Session) -> tuple[dict, bool]:
+    draft = _find_user_draft_order(user_id, db=db)
+    if draft is not None:
+        return _order_to_dict(draft), False
+
+    _lock_user_for_draft_creation(user_id, db=db)
+    draft = _find_user_draft_order(user_id, db=db)
     if draft is not None:
         return _order_to_dict(draft), False
 
@@ -244,16 +274,12 @@ def get_or_create_draft_order(user_id: int, db: Session) -> tuple[dict, bool]:
 
 
 def _get_or_create_draft_order_model(user_id: int, db: Session) -> tuple[Order, bool]:
-    draft = (
-        _order_lock_query(db)
-        .filter(
-            Order.user_id == user_id,
-            Order.status == "draft",
-        )
-        .order_by(Order.created_at.desc(), Order.id.desc())
-        .with_for_update()
-        .first()
-    )
+    draft = _lock_user_draft_order(user_id, db=db)
+    if draft is not None:
+        return draft, False
+
+    _lock_user_for_draft_creation(user_id, db=db)
+    draft = _lock_user_draft_order(user_id, db=db)
     if draft is not None:
         return draft, False
 
@@ -385,9 +411,10 @@ def add_item_to_draft_order(
             quantity=quantity,
             discount=None,
         )
-        db.add(
+        # Appending through the collection keeps order.items current without
+        # re-selecting the order after the flush.
+        order.items.append(
             OrderItem(
-                order_id=order.id,
                 product_id=variant.product_id,
                 variant_id=variant.id,
                 quantity=quantity,
@@ -400,10 +427,8 @@ def add_item_to_draft_order(
         )
 
     db.flush()
-    db.refresh(order)
     _recalculate_order_total(order, db=db)
     db.flush()
-    db.refresh(order)
     return _order_to_dict(order)
 
 
@@ -462,44 +487,27 @@ def replace_draft_order_items(user_id: int, items: list[dict], db: Session) -> d
     db.refresh(order)
     _recalculate_order_total(order, db=db)
     db.flush()
-    db.refresh(order)
     return _order_to_dict(order)
 
 
 # Legacy incremental draft-editing service kept for the deprecated DELETE /orders/draft/items/{item_id} route.
 def remove_item_from_draft_order(user_id: int, item_id: int, db: Session) -> dict | None:
-    draft = (
-        _order_lock_query(db)
-        .filter(
-            Order.user_id == user_id,
-            Order.status == "draft",
-        )
-        .order_by(Order.created_at.desc(), Order.id.desc())
-        .with_for_update()
-        .first()
-    )
+    draft = _lock_user_draft_order(user_id, db=db)
     if draft is None:
         return None
     if draft.status != "draft":
         raise ValueError("items can only be edited in draft status")
 
-    item = (
-        db.query(OrderItem)
-        .filter(
-            OrderItem.id == item_id,
-            OrderItem.order_id == draft.id,
-        )
-        .first()
-    )
+    item = next((order_item for order_item in draft.items if order_item.id == item_id), None)
     if item is None:
         return None
 
-    db.delete(item)
+    # Dropping the line from the loaded collection deletes the orphan and keeps
+    # draft.items current, so the order does not need a refresh before repricing.
+    draft.items.remove(item)
     db.flush()
-    db.refresh(draft)
     _recalculate_order_total(draft, db=db)
     db.flush()
-    db.refresh(draft)
     return _order_to_dict(draft)
 
 
@@ -513,6 +521,10 @@ def change_order_status(
     payment_ref: str | None = None,
     paid_amount: int | None = None,
 ) -> dict:
+    # Unknown statuses are rejected before touching reservations or locking the order.
+    if new_status not in ALLOWED_ORDER_STATUS:
+        raise ValueError("invalid status")
+
     expire_active_reservations_for_order(order_id=order_id, now=_utc_now(), db=db)
 
     order_filter = [Order.id == order_id]
@@ -558,15 +570,15 @@ def change_order_status(
         raise
 
     if new_status == "paid":
-        confirm_manual_payment_for_order(
+        # The confirmation re-selects this same locked row with its items and
+        # customer eager-loaded and flushes the update, so no refresh is needed.
+        order, _ = confirm_manual_payment_with_order(
             order_id=order.id,
             user_id=order.user_id,
             payment_ref=payment_ref,
             paid_amount=int(paid_amount),
             db=db,
         )
-        db.flush()
-        db.refresh(order)
         logger.info(
             "event=order_status_transition_applied order_id=%s user_id=%s is_admin=%s from=%s to=%s",
             int(order.id),
@@ -588,15 +600,16 @@ def change_order_status(
         )
         return _order_to_dict(order)
 
+    now = _utc_now()
     if order.status == "draft" and new_status == "submitted":
         _recalculate_order_total(order, db=db, force=True)
-        validate_order_pricing_before_submit(_order_to_dict(order))
+        validate_order_pricing_before_submit(order)
         reserve_stock_for_submitted_order(order_id=order.id, db=db)
         order.pricing_frozen = True
         if order.pricing_frozen_at is None:
-            order.pricing_frozen_at = _utc_now()
+            order.pricing_frozen_at = now
         if order.submitted_at is None:
-            order.submitted_at = _utc_now()
+            order.submitted_at = now
 
     if new_status == "cancelled":
         release_reservations_for_cancelled_order(
@@ -605,7 +618,7 @@ def change_order_status(
             db=db,
         )
         if order.cancelled_at is None:
-            order.cancelled_at = _utc_now()
+            order.cancelled_at = now
 
     order.status = new_status
     db.flush()
@@ -647,23 +660,13 @@ def pay_order(
     paid_amount: int,
     db: Session,
 ) -> dict:
-    confirm_manual_payment_for_order(
+    order, _ = confirm_manual_payment_with_order(
         order_id=order_id,
         user_id=user_id,
         payment_ref=payment_ref,
         paid_amount=paid_amount,
         db=db,
     )
-    order = (
-        _order_query(db)
-        .filter(
-            Order.id == order_id,
-            Order.user_id == user_id,
-        )
-        .first()
-    )
-    if order is None:
-        raise LookupError("order not found")
     return _order_to_dict(order)
 
 
@@ -676,37 +679,26 @@ def _create_submitted_order_for_user(
     if not items:
         raise ValueError("items are required")
 
-    order = Order(
-        user_id=int(user_id),
-        status="draft",
-        currency="ARS",
-        subtotal=0,
-        discount_total=0,
-        total_amount=0,
-        pricing_frozen=False,
-    )
-    db.add(order)
-    db.flush()
-
     aggregated_items = _normalize_requested_items(items)
-
-    for variant_id, quantity in aggregated_items.items():
-        variant = (
-            db.query(ProductVariant)
-            .options(joinedload(ProductVariant.product))
-            .filter(
-                ProductVariant.id == variant_id,
-                ProductVariant.is_active.is_(True),
-            )
-            .first()
+    variants = (
+        db.query(ProductVariant)
+        .options(joinedload(ProductVariant.product))
+        .filter(
+            ProductVariant.id.in_(aggregated_items.keys()),
+            ProductVariant.is_active.is_(True),
         )
-        if variant is None:
+        .all()
+    )
+    variants_by_id = {int(variant.id): variant for variant in variants}
+    for variant_id in aggregated_items:
+        if variant_id not in variants_by_id:
             raise ValueError(f"variant {variant_id} not found")
-        item_fields = _build_order_item_fields(variant=variant, quantity=quantity)
 
-        db.add(
+    order_items = []
+    for variant_id, quantity in aggregated_items.items():
+        item_fields = _build_order_item_fields(variant=variants_by_id[variant_id], quantity=quantity)
+        order_items.append(
             OrderItem(
-                order_id=order.id,
                 product_id=item_fields["product_id"],
                 variant_id=item_fields["variant_id"],
                 quantity=item_fields["quantity"],
@@ -718,19 +710,31 @@ def _create_submitted_order_for_user(
             )
         )
 
+    # The order and its lines are inserted in one flush and order.items is
+    # already populated, so no refresh is needed before repricing.
+    order = Order(
+        user_id=int(user_id),
+        status="draft",
+        currency="ARS",
+        subtotal=0,
+        discount_total=0,
+        total_amount=0,
+        pricing_frozen=False,
+        items=order_items,
+    )
+    db.add(order)
     db.flush()
-    db.refresh(order)
     _recalculate_order_total(order, db=db, force=True)
-    validate_order_pricing_before_submit(_order_to_dict(order))
+    validate_order_pricing_before_submit(order)
     reserve_stock_for_submitted_order(order_id=order.id, db=db)
     order.pricing_frozen = True
+    now = _utc_now()
     if order.pricing_frozen_at is None:
-        order.pricing_frozen_at = _utc_now()
+        order.pricing_frozen_at = now
     if order.submitted_at is None:
-        order.submitted_at = _utc_now()
+        order.submitted_at = now
     order.status = "submitted"
     db.flush()
-    db.refresh(order)
     create_admin_notification(
         event_type="order_submitted",
         title="Nueva orden submitted",
@@ -846,7 +850,7 @@ def create_admin_sale(
             raise ValueError("payment.payment_ref is required for bank_transfer")
         if method == "cash" and not payment_ref:
             payment_ref = f"cash-order-{int(order_payload['id'])}-{_utc_now().strftime('%Y%m%d%H%M%S')}"
-        payment_payload = confirm_manual_payment_for_order(
+        paid_order, payment_payload = confirm_manual_payment_with_order(
             order_id=int(order_payload["id"]),
             user_id=int(selected_user.id),
             payment_ref=payment_ref,
@@ -855,9 +859,7 @@ def create_admin_sale(
             change_amount=int(change_amount) if change_amount is not None else None,
             db=db,
         )
-        order_after_payment = get_order_for_admin(order_id=int(order_payload["id"]), db=db)
-        if order_after_payment is not None:
-            order_payload = order_after_payment
+        order_payload = _order_to_dict(paid_order)
     elif payment is not None:
         raise ValueError("payment must be null when register_payment is false")
 
@@ -3,12 +3,13 @@
 from datetime import datetime, timedelta, UTC
 import hashlib
 import json
+from operator import attrgetter
 from urllib.parse import urlparse
 import uuid
 
-from sqlalchemy import func, or_
+from sqlalchemy import Row, func, or_
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm import Session, defer, joinedload, selectinload
 
 from source.db.config import (
     get_mercadopago_env,
@@ -17,7 +18,7 @@ from source.db.config import (
     get_mercadopago_pending_url,
     get_mercadopago_success_url,
 )
-from source.db.models import Order, Payment, PaymentIncident, WebhookEvent
+from source.db.models import Order, OrderItem, Payment, PaymentIncident, WebhookEvent
 from source.exceptions import WebhookReplayConflictError
 from source.services.refund_s import (
     PAYMENT_INCIDENT_STATUS_PENDING_REVIEW,
@@ -32,10 +33,12 @@ from source.services.stock_reservations_s import (
     list_active_reservations_for_order,
 )
 
-ALLOWED_PAYMENT_METHODS = {"bank_transfer", "mercadopago", "cash"}
-RETRYABLE_PAYMENT_STATUSES = {"cancelled", "expired"}
+ALLOWED_PAYMENT_METHODS = frozenset({"bank_transfer", "mercadopago", "cash"})
+RETRYABLE_PAYMENT_STATUSES = frozenset({"cancelled", "expired"})
 DEFAULT_WEBHOOK_MAX_ATTEMPTS = 4
 DEFAULT_WEBHOOK_RETRY_DELAY_MINUTES = 60
+MERCADOPAGO_EXPIRATION_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+_PROVIDER_PAYLOAD_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=True)
 MERCADOPAGO_PROVIDER_TO_INTERNAL_STATUS = {
     "approved": "paid",
     "accredited": "paid",
@@ -49,10 +52,10 @@ MERCADOPAGO_PROVIDER_TO_INTERNAL_STATUS = {
     "expired": "expired",
 }
 ALLOWED_PAYMENT_TRANSITIONS = {
-    "pending": {"pending", "paid", "cancelled", "expired"},
-    "paid": {"paid"},
-    "cancelled": {"cancelled"},
-    "expired": {"expired"},
+    "pending": frozenset({"pending", "paid", "cancelled", "expired"}),
+    "paid": frozenset({"paid"}),
+    "cancelled": frozenset({"cancelled"}),
+    "expired": frozenset({"expired"}),
 }
 MERCADOPAGO_ALLOWED_CHECKOUT_HOSTS = {
     "www.mercadopago.com",
@@ -64,28 +67,40 @@ MERCADOPAGO_ALLOWED_CHECKOUT_HOSTS = {
 }
 
 
-def _payment_to_dict(payment: Payment) -> dict:
-    parsed_provider_payload = _deserialize_provider_payload(payment.provider_payload)
-    return {
-        "id": payment.id,
-        "order_id": payment.order_id,
-        "method": payment.method,
-        "status": payment.status,
-        "amount": int(payment.amount),
-        "change_amount": int(payment.change_amount) if payment.change_amount is not None else None,
-        "currency": payment.currency,
-        "idempotency_key": payment.idempotency_key,
-        "external_ref": payment.external_ref,
-        "preference_id": payment.preference_id,
-        "provider_status": payment.provider_status,
-        "provider_payload": payment.provider_payload,
-        "provider_payload_data": parsed_provider_payload,
-        "receipt_url": payment.receipt_url,
-        "expires_at": payment.expires_at,
-        "paid_at": payment.paid_at,
-        "created_at": payment.created_at,
-        "updated_at": payment.updated_at,
-    }
+_PAYMENT_DICT_FIELDS = (
+    "id",
+    "order_id",
+    "method",
+    "status",
+    "amount",
+    "change_amount",
+    "currency",
+    "idempotency_key",
+    "external_ref",
+    "preference_id",
+    "provider_status",
+    "receipt_url",
+    "expires_at",
+    "paid_at",
+    "created_at",
+    "updated_at",
+)
+_get_payment_dict_fields = attrgetter(*_PAYMENT_DICT_FIELDS)
+
+
+def _payment_to_dict(payment: Payment | Row, *, include_payload: bool = True) -> dict:
+    # One attrgetter call reads every column, which matters when listing many payments.
+    data = dict(zip(_PAYMENT_DICT_FIELDS, _get_payment_dict_fields(payment)))
+    data["amount"] = int(data["amount"])
+    if data["change_amount"] is not None:
+        data["change_amount"] = int(data["change_amount"])
+    if include_payload:
+        data["provider_payload"] = payment.provider_payload
+        data["provider_payload_data"] = _deserialize_provider_payload(payment.provider_payload)
+    else:
+        data["provider_payload"] = None
+        data["provider_payload_data"] = None
+    return data
 
 
 def _open_incident_status_by_payment_ids(*, payment_ids: list[int], db: Session) -> dict[int, str]:
@@ -108,7 +123,7 @@ def _open_incident_status_by_payment_ids(*, payment_ids: list[int], db: Session)
 def _serialize_provider_payload(payload: dict | None) -> str | None:
     if payload is None:
         return None
-    return json.dumps(payload, separators=(",", ":"), ensure_ascii=True)
+    return _PROVIDER_PAYLOAD_ENCODER.encode(payload)
 
 
 def _deserialize_provider_payload(payload: str | None) -> dict | None:
@@ -615,8 +630,11 @@ def _map_mercadopago_provider_status(provider_status: str) -> str:
 
 
 def _assert_valid_payment_transition(current_status: str, next_status: str) -> None:
-    allowed = ALLOWED_PAYMENT_TRANSITIONS.get(current_status, {current_status})
-    if next_status not in allowed:
+    # Staying in the same status is always allowed, including unknown ones, so
+    # no fallback set has to be built per call.
+    if next_status == current_status:
+        return
+    if next_status not in ALLOWED_PAYMENT_TRANSITIONS.get(current_status, ()):
         raise ValueError("invalid payment status transition")
 
 
@@ -627,6 +645,8 @@ def _find_active_pending_payment(
     method: str,
     now: datetime,
 ) -> Payment | None:
+    # uq_payments_one_pending_per_order_method allows at most one pending row per
+    # order and method, so this is a single partial-index probe with no sort.
     return (
         session.query(Payment)
         .filter(
@@ -635,7 +655,6 @@ def _find_active_pending_payment(
             Payment.status == "pending",
             or_(Payment.expires_at.is_(None), Payment.expires_at > now),
         )
-        .order_by(Payment.created_at.desc(), Payment.id.desc())
         .first()
     )
 
@@ -747,9 +766,7 @@ def _build_mercadopago_payload(
         },
         "notification_url": get_mercadopago_notification_url(),
         "expires": True,
-        "date_of_expiration": (
-            expires_at.astimezone(UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
-        ),
+        "date_of_expiration": expires_at.astimezone(UTC).strftime(MERCADOPAGO_EXPIRATION_FORMAT),
         "metadata": {
             "order_id": order_id,
             "payment_id": payment_id,
@@ -881,8 +898,8 @@ def apply_mercadopago_normalized_state(
         _assert_valid_payment_transition(payment.status, internal_status)
     payment.provider_status = provider_status
 
-    existing_payload = _deserialize_provider_payload(payment.provider_payload) or {}
-    merged_payload = dict(existing_payload)
+    # The parsed payload is a fresh dict, so it is merged into directly.
+    merged_payload = _deserialize_provider_payload(payment.provider_payload) or {}
     if notification_payload is not None:
         merged_payload["last_event"] = notification_payload
     merged_payload["payment_lookup"] = normalized_state.get("raw")
@@ -979,8 +996,9 @@ def apply_mercadopago_normalized_state(
         # The order stays in its current state so the customer can retry payment.
         pass
 
+    # Every payment column has a Python-side default, so the flushed object
+    # already matches the row and needs no refresh.
     db.flush()
-    db.refresh(payment)
     return _payment_to_dict(payment)
 
 
@@ -1029,9 +1047,10 @@ def create_payment_for_order(
             raise LookupError("order not found")
         return _payment_to_dict(existing_payment)
 
+    # Payment creation only reads these columns, so the locked row is fetched
+    # as a plain tuple rather than a full Order instance.
     order = (
-        db.query(Order)
-        .options(selectinload(Order.items))
+        db.query(Order.id, Order.user_id, Order.status, Order.currency, Order.total_amount)
         .filter(Order.id == order_id)
         .with_for_update()
         .first()
@@ -1040,11 +1059,17 @@ def create_payment_for_order(
         raise LookupError("order not found")
     if user_id is not None and int(order.user_id) != int(user_id):
         raise LookupError("order not found")
-    if order.status == "cancelled":
-        raise ValueError("cannot create payment for a cancelled order")
     if order.status != "submitted":
+        if order.status == "cancelled":
+            raise ValueError("cannot create payment for a cancelled order")
         raise ValueError("payment can only be created for submitted orders")
-    if not order.items:
+    # Only the presence of lines matters here, so probe one id instead of
+    # loading every item.
+    has_items = (
+        db.query(OrderItem.id).filter(OrderItem.order_id == order.id).first()
+        is not None
+    )
+    if not has_items:
         raise ValueError("cannot create payment for an empty order")
     if not list_active_reservations_for_order(order_id=order.id, db=db):
         raise ValueError("order has no active stock reservations")
@@ -1156,7 +1181,6 @@ def create_payment_for_order(
             payment.provider_payload = _serialize_provider_payload(provider_payload)
 
     db.flush()
-    db.refresh(payment)
     return _payment_to_dict(payment)
 
 
@@ -1242,6 +1266,28 @@ def confirm_manual_payment_for_order(
     change_amount: int | None = None,
     db: Session,
 ) -> dict:
+    _, payment = confirm_manual_payment_with_order(
+        order_id=order_id,
+        user_id=user_id,
+        payment_ref=payment_ref,
+        paid_amount=paid_amount,
+        method=method,
+        change_amount=change_amount,
+        db=db,
+    )
+    return payment
+
+
+def confirm_manual_payment_with_order(
+    *,
+    order_id: int,
+    user_id: int,
+    payment_ref: str,
+    paid_amount: int,
+    method: str = "bank_transfer",
+    change_amount: int | None = None,
+    db: Session,
+) -> tuple[Order, dict]:
     expire_active_reservations_for_order(
         order_id=order_id,
         now=datetime.now(UTC),
@@ -1270,11 +1316,17 @@ def confirm_manual_payment_for_order(
         if normalized_change_amount is not None:
             raise ValueError("change_amount is only allowed for cash payments")
 
+    # Items come with their variant/product and the customer so the returned
+    # order can be serialized without querying it again.
     order = (
         db.query(Order)
         .options(
-            selectinload(Order.items),
+            selectinload(Order.items).options(
+                joinedload(OrderItem.variant),
+                joinedload(OrderItem.product),
+            ),
             selectinload(Order.payments),
+            selectinload(Order.user),
         )
         .filter(Order.id == order_id)
         .with_for_update()
@@ -1314,7 +1366,7 @@ def confirm_manual_payment_for_order(
             existing_paid_by_ref is not None
             and int(existing_paid_by_ref.amount) == received_total
         ):
-            return _payment_to_dict(existing_paid_by_ref)
+            return order, _payment_to_dict(existing_paid_by_ref)
         raise ValueError("order already paid with a different payment_ref")
 
     consume_reservations_for_paid_order(order_id=order.id, db=db)
@@ -1355,7 +1407,7 @@ def confirm_manual_payment_for_order(
                 "method": normalized_method,
                 "amount_paid": received_total,
                 "change_amount": normalized_change_amount,
-                "confirmed_at": now.isoformat() + "Z",
+                "confirmed_at": now.isoformat(timespec="microseconds").replace("+00:00", "Z"),
             }
         }
     )
@@ -1393,8 +1445,7 @@ def confirm_manual_payment_for_order(
         dedupe_key=f"user:{int(order.user_id)}:order:{int(order.id)}:ready_to_pickup",
         db=db,
     )
-    db.refresh(payment)
-    return _payment_to_dict(payment)
+    return order, _payment_to_dict(payment)
 
 
 def list_payments_for_order(
@@ -1402,20 +1453,24 @@ def list_payments_for_order(
     user_id: int,
     db: Session,
 ) -> list[dict]:
-    order = (
-        db.query(Order)
-        .filter(Order.id == order_id, Order.user_id == user_id)
-        .first()
-    )
-    if order is None:
-        raise LookupError("order not found")
-
+    # Ownership is enforced by the join; the order only needs its own lookup
+    # when there are no payments to tell "not yours" from "nothing yet". Rows
+    # are plain column tuples, so no Payment instances are built for the list.
     payments = (
-        db.query(Payment)
-        .filter(Payment.order_id == order_id)
+        db.query(*Payment.__table__.columns)
+        .join(Order, Order.id == Payment.order_id)
+        .filter(Payment.order_id == order_id, Order.user_id == user_id)
         .order_by(Payment.created_at.desc(), Payment.id.desc())
         .all()
     )
+    if not payments:
+        order_exists = (
+            db.query(Order.id)
+            .filter(Order.id == order_id, Order.user_id == user_id)
+            .first()
+        )
+        if order_exists is None:
+            raise LookupError("order not found")
     return [_payment_to_dict(payment) for payment in payments]
 
 
@@ -1427,13 +1482,16 @@ def list_payments_for_order_admin(
     order_exists = db.query(Order.id).filter(Order.id == order_id).first()
     if order_exists is None:
         raise LookupError("order not found")
+    # The admin list never shows provider payloads, so the raw provider
+    # responses are left in the database.
     payments = (
         db.query(Payment)
+        .options(defer(Payment.provider_payload, raiseload=True))
         .filter(Payment.order_id == order_id)
         .order_by(Payment.created_at.desc(), Payment.id.desc())
         .all()
     )
-    result = [_payment_to_dict(payment) for payment in payments]
+    result = [_payment_to_dict(payment, include_payload=False) for payment in payments]
     status_by_payment = _open_incident_status_by_payment_ids(
         payment_ids=[int(payment.id) for payment in payments],
         db=db,
@@ -1450,16 +1508,18 @@ def get_payment_for_user(
     user_id: int,
     db: Session,
 ) -> dict:
-    payment = (
-        db.query(Payment)
+    # A plain column row is enough for _payment_to_dict, which only reads
+    # attributes, so no Payment instance is built for this read-only lookup.
+    payment_row = (
+        db.query(*Payment.__table__.columns)
         .join(Order, Payment.order_id == Order.id)
         .filter(Payment.id == payment_id, Order.user_id == user_id)
         .first()
     )
-    if payment is None:
+    if payment_row is None:
         raise LookupError("payment not found")
 
-    return _payment_to_dict(payment)
+    return _payment_to_dict(payment_row)
 
 
 def get_payment_public_status(
@@ -1534,7 +1594,6 @@ def submit_bank_transfer_receipt(
     payment.receipt_url = normalized_receipt_url
     payment.provider_payload = _serialize_provider_payload(payload)
     db.flush()
-    db.refresh(payment)
     return _payment_to_dict(payment)
 
 
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from contextlib import contextmanager
+from datetime import UTC, datetime
 from typing import Literal
 
 from sqlalchemy import asc, desc, func
@@ -9,10 +11,10 @@ from sqlalchemy.orm import Session, joinedload
 from source.db.models import Category, Product, ProductVariant
 from source.db.session import SessionLocal
 from source.services.discount_s import (
-    DiscountDTO,
+    DiscountRule,
     calculate_line_pricing,
     get_applicable_discounts_for_product,
-    list_discounts,
+    list_discount_rules,
     select_best_discount,
 )
 
@@ -163,7 +165,7 @@ def _product_to_storefront_dict(
 def _calculate_variant_pricing_for_storefront(
     *,
     variant: ProductVariant,
-    product_discounts: list[DiscountDTO],
+    product_discounts: list[DiscountRule],
 ) -> tuple[int, int]:
     unit_price = int(variant.price)
     best_discount = select_best_discount(product_discounts, unit_price=unit_price)
@@ -174,7 +176,8 @@ def _calculate_variant_pricing_for_storefront(
 def _build_storefront_product_pricing(
     *,
     product: Product,
-    discounts: list[DiscountDTO],
+    discounts: list[DiscountRule],
+    at: datetime | None = None,
 ) -> tuple[int | None, int | None, bool]:
     active_variants = [variant for variant in product.variants if bool(variant.is_active)]
     if not active_variants:
@@ -184,7 +187,11 @@ def _build_storefront_product_pricing(
         "id": int(product.id),
         "category_id": int(product.category_id),
     }
-    applicable_discounts = get_applicable_discounts_for_product(product=product_stub, discounts=discounts)
+    applicable_discounts = get_applicable_discounts_for_product(
+        product=product_stub,
+        discounts=discounts,
+        at=at,
+    )
     min_original: int | None = None
     min_final: int | None = None
 
@@ -329,6 +336,20 @@ def get_product_by_id(product_id: int, db: Session | None = None) -> dict | None
         return _product_to_dict(product)
 
 
+def get_products_by_ids(product_ids: Iterable[int], db: Session | None = None) -> dict[int, dict]:
+    unique_ids = {int(product_id) for product_id in product_ids}
+    if not unique_ids:
+        return {}
+    with _read_session_scope(db) as (session, _):
+        products = (
+            session.query(Product)
+            .options(joinedload(Product.category), joinedload(Product.variants))
+            .filter(Product.id.in_(unique_ids))
+            .all()
+        )
+        return {int(product.id): _product_to_dict(product) for product in products}
+
+
 def update_product(product_id: int, updates: dict, db: Session) -> dict | None:
     allowed_fields = {"name", "description", "img_url", "category", "active"}
     with _write_session_scope(db) as (session, _):
@@ -608,13 +629,15 @@ def list_storefront_products(
 
         query = query.order_by(desc(column) if sort_order == "desc" else asc(column))
         rows = query.offset(safe_offset).limit(safe_limit).all()
-        discounts = list_discounts(db=session)
+        discounts = list_discount_rules(db=session)
+        now = datetime.now(UTC)
 
         data = []
         for product, _min_var_price, active_stock_sum in rows:
             min_original, min_final, has_discount = _build_storefront_product_pricing(
                 product=product,
                 discounts=discounts,
+                at=now,
             )
             data.append(
                 _product_to_storefront_dict(
@@ -650,15 +673,21 @@ def get_storefront_product_by_id(product_id: int, db: Session | None = None) ->
         if not active_variants:
             return None
 
-        discounts = list_discounts(db=session)
+        discounts = list_discount_rules(db=session)
         product_stub = {
             "id": int(product.id),
             "category_id": int(product.category_id),
         }
-        applicable_discounts = get_applicable_discounts_for_product(product=product_stub, discounts=discounts)
+        now = datetime.now(UTC)
+        applicable_discounts = get_applicable_discounts_for_product(
+            product=product_stub,
+            discounts=discounts,
+            at=now,
+        )
         min_var_price_original, min_var_price_final, has_discount = _build_storefront_product_pricing(
             product=product,
             discounts=discounts,
+            at=now,
         )
         active_stock_sum = sum(int(variant.stock) for variant in active_variants)
 
@@ -2,7 +2,7 @@
 
 from datetime import datetime, timedelta, UTC
 
-from sqlalchemy import func
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 
 from source.db.models import Order, OrderItem, Payment, ProductVariant, StockReservation
@@ -314,21 +314,40 @@ def consume_reservations_for_paid_order(order_id: int, db: Session) -> list[dict
             return [_reservation_to_dict(reservation) for reservation in consumed]
         raise ValueError("no active reservations for order")
 
+    required_by_variant: dict[int, int] = {}
     for reservation in active_reservations:
-        updated = (
-            db.query(ProductVariant)
-            .filter(
-                ProductVariant.id == reservation.variant_id,
-                ProductVariant.stock >= int(reservation.quantity),
-            )
-            .update(
-                {ProductVariant.stock: ProductVariant.stock - int(reservation.quantity)},
-                synchronize_session=False,
-            )
+        variant_id = int(reservation.variant_id)
+        required_by_variant[variant_id] = (
+            required_by_variant.get(variant_id, 0) + int(reservation.quantity)
+        )
+
+    # One locked read validates every variant and one UPDATE decrements them all.
+    stock_by_variant = dict(
+        db.query(ProductVariant.id, ProductVariant.stock)
+        .filter(ProductVariant.id.in_(required_by_variant))
+        .with_for_update()
+        .all()
+    )
+    for variant_id, quantity in required_by_variant.items():
+        if int(stock_by_variant.get(variant_id) or 0) < quantity:
+            raise ValueError(f"insufficient stock for variant {variant_id}")
+
+    required_quantity = case(required_by_variant, value=ProductVariant.id)
+    updated = (
+        db.query(ProductVariant)
+        .filter(
+            ProductVariant.id.in_(required_by_variant),
+            ProductVariant.stock >= required_quantity,
         )
-        if int(updated or 0) != 1:
-            raise ValueError(f"insufficient stock for variant {reservation.variant_id}")
+        .update(
+            {ProductVariant.stock: ProductVariant.stock - required_quantity},
+            synchronize_session=False,
+        )
+    )
+    if int(updated or 0) != len(required_by_variant):
+        raise ValueError("insufficient stock for order")
 
+    for reservation in active_reservations:
         reservation.status = RESERVATION_CONSUMED
         reservation.consumed_at = now
         reservation.reason = "order_paid"
@@ -10,8 +10,8 @@ BACKEND_DIR = Path(__file__).resolve().parents[1]
 if str(BACKEND_DIR) not in sys.path:
     sys.path.insert(0, str(BACKEND_DIR))
 
-from source.db.models import Base, Category, Product, ProductVariant, User
-from source.services.orders_s import create_admin_sale
+from source.db.models import Base, Category, Order, Product, ProductVariant, User
+from source.services.orders_s import create_admin_sale, get_or_create_draft_order
 from source.services.stock_reservations_s import list_active_reservations_for_order
 
 
@@ -105,6 +105,40 @@ class AdminSalesTests(unittest.TestCase):
         self.assertFalse(result["meta"]["customer_created"])
         self.assertFalse(result["meta"]["payment_registered"])
 
+    def test_create_admin_sale_keeps_customer_draft(self) -> None:
+        variant_id = self._seed_variant()
+        user_id = self._seed_user()
+        session = self.TestSession()
+        try:
+            draft, created = get_or_create_draft_order(user_id=user_id, db=session)
+            self.assertTrue(created)
+            result = create_admin_sale(
+                admin_user_id=1,
+                customer={
+                    "mode": "existing",
+                    "user_id": user_id,
+                },
+                items=[{"variant_id": variant_id, "quantity": 1}],
+                register_payment=False,
+                payment=None,
+                db=session,
+            )
+            same_draft, created_again = get_or_create_draft_order(user_id=user_id, db=session)
+            session.commit()
+            drafts = (
+                session.query(Order)
+                .filter(Order.user_id == user_id, Order.status == "draft")
+                .count()
+            )
+        finally:
+            session.close()
+
+        self.assertEqual(result["order"]["status"], "submitted")
+        self.assertNotEqual(result["order"]["id"], draft["id"])
+        self.assertFalse(created_again)
+        self.assertEqual(same_draft["id"], draft["id"])
+        self.assertEqual(drafts, 1)
+
     def test_create_admin_sale_new_user_with_bank_transfer_payment(self) -> None:
         variant_id = self._seed_variant()
         session = self.TestSession()
@@ -0,0 +1,67 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from source.services.mercadopago_client import MAX_RETRY_ATTEMPTS, _call_with_retries
+from source.services.payment_errors import (
+    PaymentProviderTimeoutError,
+    PaymentProviderUnavailableError,
+    PaymentProviderValidationError,
+)
+
+
+class MercadoPagoRetryTests(unittest.TestCase):
+    def test_retries_server_errors_then_returns_response_data(self) -> None:
+        responses = iter(
+            [
+                {"status": 503, "response": None},
+                {"status": 200, "response": {"id": "pay-1"}},
+            ]
+        )
+        with patch("source.services.mercadopago_client._backoff_sleep") as backoff:
+            data = _call_with_retries(lambda: next(responses), operation="payment lookup")
+
+        self.assertEqual(data, {"id": "pay-1"})
+        backoff.assert_called_once_with(1)
+
+    def test_client_error_is_not_retried(self) -> None:
+        calls: list[int] = []
+
+        def thunk() -> dict:
+            calls.append(1)
+            return {"status": 400, "response": {}}
+
+        with patch("source.services.mercadopago_client._backoff_sleep") as backoff:
+            with self.assertRaises(PaymentProviderValidationError):
+                _call_with_retries(thunk, operation="payment lookup")
+
+        self.assertEqual(len(calls), 1)
+        backoff.assert_not_called()
+
+    def test_timeouts_exhaust_attempts(self) -> None:
+        def thunk() -> dict:
+            raise TimeoutError()
+
+        with patch("source.services.mercadopago_client._backoff_sleep") as backoff:
+            with self.assertRaises(PaymentProviderTimeoutError) as ctx:
+                _call_with_retries(thunk, operation="refund creation", request_kind="refund")
+
+        self.assertEqual(str(ctx.exception), "mercadopago refund request timed out")
+        self.assertEqual(backoff.call_count, MAX_RETRY_ATTEMPTS - 1)
+
+    def test_invalid_payload_exhausts_attempts(self) -> None:
+        with patch("source.services.mercadopago_client._backoff_sleep"):
+            with self.assertRaises(PaymentProviderUnavailableError):
+                _call_with_retries(
+                    lambda: {"status": 200, "response": []},
+                    operation="payment search",
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
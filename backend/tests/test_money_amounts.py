@@ -7,6 +7,7 @@ BACKEND_DIR = Path(__file__).resolve().parents[1]
 if str(BACKEND_DIR) not in sys.path:
     sys.path.insert(0, str(BACKEND_DIR))
 
+from source.services.discount_s import DiscountRule, calculate_line_discount, calculate_line_pricing
 from source.services.money_s import calcular_amount, decimal_to_cents, parse_amount_to_cents
 
 
@@ -41,6 +42,33 @@ class MoneyAmountsTests(unittest.TestCase):
         self.assertEqual(result["final_unit_price"], 0)
         self.assertEqual(result["line_total"], 0)
 
+    def test_calculate_line_discount_matches_calcular_amount(self) -> None:
+        for unit_price in (1, 99, 1005, 12345):
+            for percent in (1, 15, 33, 50, 100):
+                expected = calcular_amount(
+                    unit_price=unit_price,
+                    quantity=1,
+                    discount_type="percent",
+                    discount_value=percent,
+                )["discount_amount"]
+                discount = DiscountRule(id=1, type="percent", value=percent, scope="all")
+                self.assertEqual(calculate_line_discount(unit_price, discount), expected)
+        fixed = DiscountRule(id=2, type="fixed", value=900, scope="all")
+        self.assertEqual(calculate_line_discount(500, fixed), 500)
+
+    def test_calculate_line_pricing_matches_calcular_amount(self) -> None:
+        discount = DiscountRule(id=7, type="percent", value=15, scope="all")
+        pricing = calculate_line_pricing(unit_price=10005, quantity=3, discount=discount)
+        expected = calcular_amount(
+            unit_price=10005,
+            quantity=3,
+            discount_type="percent",
+            discount_value=15,
+        )
+        self.assertEqual(pricing["discount_id"], 7)
+        for field in ("discount_amount", "final_unit_price", "line_total"):
+            self.assertEqual(pricing[field], expected[field])
+
     def test_calcular_amount_rejects_negative_values(self) -> None:
         with self.assertRaises(ValueError):
             parse_amount_to_cents("-1")
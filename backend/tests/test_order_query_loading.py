@@ -0,0 +1,84 @@
+import sys
+import unittest
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from source.db.models import Base, Category, Order, OrderItem, Product, ProductVariant, User
+from source.services.orders_s import _order_query, _order_to_dict
+
+
+class OrderQueryLoadingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.TestSession = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        session = self.TestSession()
+        try:
+            user = User(first_name="Load", last_name="Tester", email="load@example.com", password_hash="!")
+            category = Category(name="cat")
+            session.add_all([user, category])
+            session.flush()
+            product = Product(name="Product", category_id=category.id)
+            session.add(product)
+            session.flush()
+            variant = ProductVariant(product_id=product.id, sku="LOAD-1", price=1000, stock=5)
+            session.add(variant)
+            session.flush()
+            order = Order(user_id=user.id, status="draft", currency="ARS")
+            session.add(order)
+            session.flush()
+            session.add(
+                OrderItem(
+                    order_id=order.id,
+                    product_id=product.id,
+                    variant_id=variant.id,
+                    quantity=1,
+                    unit_price=1000,
+                    final_unit_price=1000,
+                    line_total=1000,
+                )
+            )
+            session.commit()
+            self.order_id = int(order.id)
+        finally:
+            session.close()
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+
+    def test_order_query_loads_everything_order_to_dict_needs(self) -> None:
+        session = self.TestSession()
+        statements: list[str] = []
+        try:
+            order = _order_query(session).filter(Order.id == self.order_id).one()
+            event.listen(
+                self.engine,
+                "before_cursor_execute",
+                lambda conn, cursor, statement, *args: statements.append(statement),
+            )
+            payload = _order_to_dict(order)
+        finally:
+            session.close()
+
+        self.assertEqual(statements, [])
+        self.assertEqual(payload["customer"]["email"], "load@example.com")
+        self.assertEqual(payload["items"][0]["product_name"], "Product")
+
+    def test_order_query_leaves_other_relationships_loadable(self) -> None:
+        session = self.TestSession()
+        try:
+            order = _order_query(session).filter(Order.id == self.order_id).one()
+            self.assertEqual(order.payments, [])
+            self.assertEqual(order.stock_reservations, [])
+            self.assertIsNone(order.items[0].discount)
+        finally:
+            session.close()
+
+if __name__ == "__main__":
+    unittest.main()
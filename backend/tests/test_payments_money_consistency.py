@@ -30,6 +30,7 @@ from source.services.payment_s import (
     create_payment_for_order,
     create_retry_payment_for_order,
     find_payment_for_mercadopago_event,
+    list_payments_for_order,
     submit_bank_transfer_receipt,
 )
 
@@ -144,6 +145,25 @@ class PaymentsMoneyConsistencyTests(unittest.TestCase):
         self.assertIn("provider_payload_data", payment)
         self.assertIsInstance(payment["provider_payload_data"], dict)
 
+    def test_list_payments_for_order_checks_ownership(self) -> None:
+        order_id, user_id = self._seed_submitted_order_with_reservation()
+        session = self.TestSession()
+        try:
+            self.assertEqual(list_payments_for_order(order_id=order_id, user_id=user_id, db=session), [])
+            payment = create_payment_for_order(
+                order_id=order_id,
+                method="bank_transfer",
+                db=session,
+                user_id=user_id,
+                idempotency_key=f"idemp-{datetime.now(UTC).timestamp()}",
+            )
+            payments = list_payments_for_order(order_id=order_id, user_id=user_id, db=session)
+            with self.assertRaises(LookupError):
+                list_payments_for_order(order_id=order_id, user_id=user_id + 1, db=session)
+        finally:
+            session.close()
+        self.assertEqual([item["id"] for item in payments], [payment["id"]])
+
     def test_normalize_checkout_url_accepts_expected_https_host(self) -> None:
         checkout_url = normalize_and_validate_mercadopago_checkout_url(
             {
@@ -10,9 +10,11 @@ BACKEND_DIR = Path(__file__).resolve().parents[1]
 if str(BACKEND_DIR) not in sys.path:
     sys.path.insert(0, str(BACKEND_DIR))
 
-from source.db.models import Base, WebhookEvent
+from source.db.models import Base, Category, WebhookEvent
 from source.services.mercadopago_client import (
     WebhookNoOpError,
+    _claim_inflight_webhook,
+    _release_inflight_webhook,
     resolver_evento_webhook_mercadopago,
 )
 
@@ -92,6 +94,92 @@ class WebhookNoOpRetryableTests(unittest.TestCase):
         finally:
             session.close()
 
+    def test_failed_processing_discards_partial_writes(self) -> None:
+        session = self.TestSession()
+        try:
+            payload = {"type": "payment", "data": {"id": "789"}, "id": "evt-3"}
+
+            def failing_process(**kwargs) -> dict:
+                kwargs["db"].add(Category(name="partial write"))
+                kwargs["db"].flush()
+                raise RuntimeError("apply failed")
+
+            with patch(
+                "source.services.mercadopago_client.is_mercadopago_signature_valid",
+                return_value=True,
+            ), patch(
+                "source.services.mercadopago_client.process_mercadopago_event_payload",
+                side_effect=failing_process,
+            ):
+                with self.assertRaises(RuntimeError):
+                    resolver_evento_webhook_mercadopago(
+                        payload=payload,
+                        x_signature="ok",
+                        x_request_id="req-3",
+                        db=session,
+                    )
+            session.commit()
+
+            self.assertEqual(session.query(Category).count(), 0)
+            event = session.query(WebhookEvent).filter(WebhookEvent.event_key == "mp:event:evt-3").first()
+            self.assertIsNotNone(event)
+            assert event is not None
+            self.assertEqual(event.status, "failed")
+            self.assertEqual(event.last_error, "apply failed")
+        finally:
+            session.close()
+
+    def test_redelivery_while_in_flight_is_dropped(self) -> None:
+        session = self.TestSession()
+        try:
+            payload = {"type": "payment", "data": {"id": "654"}, "id": "evt-5"}
+            redelivery_errors: list[WebhookNoOpError] = []
+
+            def process_with_redelivery(**_: object) -> dict:
+                try:
+                    resolver_evento_webhook_mercadopago(
+                        payload=payload,
+                        x_signature="ok",
+                        x_request_id="req-5",
+                        db=session,
+                    )
+                except WebhookNoOpError as exc:
+                    redelivery_errors.append(exc)
+                return {"id": 1}
+
+            with patch(
+                "source.services.mercadopago_client.is_mercadopago_signature_valid",
+                return_value=True,
+            ), patch(
+                "source.services.mercadopago_client.process_mercadopago_event_payload",
+                side_effect=process_with_redelivery,
+            ) as process_mock:
+                result = resolver_evento_webhook_mercadopago(
+                    payload=payload,
+                    x_signature="ok",
+                    x_request_id="req-5",
+                    db=session,
+                )
+
+            self.assertTrue(result.processed)
+            self.assertEqual(process_mock.call_count, 1)
+            self.assertEqual([str(exc) for exc in redelivery_errors], ["duplicate webhook event"])
+        finally:
+            session.close()
+
+
+    def test_expired_claim_release_keeps_the_newer_claim(self) -> None:
+        event_key = "mp:event:evt-6"
+        with patch("source.services.mercadopago_client.WEBHOOK_INFLIGHT_TTL_SECONDS", 0):
+            first_token = _claim_inflight_webhook(event_key)
+            second_token = _claim_inflight_webhook(event_key)
+        self.assertIsNotNone(first_token)
+        self.assertIsNotNone(second_token)
+        self.addCleanup(_release_inflight_webhook, event_key, second_token)
+
+        _release_inflight_webhook(event_key, first_token)
+
+        self.assertIsNone(_claim_inflight_webhook(event_key))
 
 if __name__ == "__main__":
     unittest.main()